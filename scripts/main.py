@@ -2,11 +2,10 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import os
-import matplotlib.pyplot as plt
-import seaborn as sns
 import argparse
+from concurrent.futures import ProcessPoolExecutor
 import yaml
-from process import filter_scc_data, filter_poll_data
+from process import filter_scc_data, scc_mask, bin_stats
 from read_data import DataReader
 from plot import plot_stack_height_analysis
 
@@ -28,79 +27,119 @@ def load_config(config_path: str) -> dict:
         config = yaml.safe_load(file)
     return config
 
-def analyze_stack_heights(
+def _build_pollutant_index(combined_df: pd.DataFrame) -> tuple[dict[str, pd.DataFrame], np.ndarray]:
+    """
+    Split the combined dataframe by pollutant once so categories can reuse it.
+
+    Rows without a stack height or SCC are dropped and the SCC column is
+    factorized up front into an int32 `scc_code` column, so per-category
+    filtering reduces to indexing a small boolean lookup table by code.
+
+    Parameters
+    ----------
+    combined_df : pandas.DataFrame
+        Combined NEI point-source dataframe
+
+    Returns
+    -------
+    dict of str to pandas.DataFrame
+        Mapping of pollutant to its rows with valid stack heights
+    numpy.ndarray
+        Unique SCC values, indexed by `scc_code`
+    """
+    valid_df = combined_df.dropna(subset=['stkhgt', 'scc'])
+    valid_df = valid_df.astype({'scc': 'int64'})
+    codes, scc_uniques = pd.factorize(valid_df['scc'])
+    valid_df = valid_df.assign(scc_code=codes.astype(np.int32))
+    poll_index = {poll: poll_df for poll, poll_df in valid_df.groupby('poll', sort=False)}
+    return poll_index, np.asarray(scc_uniques)
+
+def _prepare_category(
     data_reader: DataReader,
-    keywords: list[str],
-    scc_level: int,
-    pollutant: str,
+    poll_index: dict[str, pd.DataFrame],
+    scc_uniques: np.ndarray,
+    params: dict,
+) -> pd.DataFrame:
+    """
+    Select the rows belonging to one analysis category.
+
+    The SCC keyword filter and the pollutant+SCC row selection run once per
+    category; every analysis of the category works on the returned rows.
+
+    Parameters
+    ----------
+    data_reader : DataReader
+        DataReader instance containing the SCC dataframe
+    poll_index : dict of str to pandas.DataFrame
+        Pollutant index built by `_build_pollutant_index`
+    scc_uniques : numpy.ndarray
+        Unique SCC values returned alongside the pollutant index
+    params : dict
+        Category configuration with `keywords`, `scc_level` and `pollutant`
+
+    Returns
+    -------
+    pandas.DataFrame
+        Full rows for the category pollutant and SCCs with valid stack heights
+    """
+    # Filter SCC data
+    filtered_df = filter_scc_data(data_reader.df_scc, keywords=params["keywords"], scc_level=params["scc_level"])
+    print(f"\nFiltered SCC dataframe shape: {filtered_df.shape}")
+    print(f"\nFiltered SCC dataframe head: {filtered_df.head()}\n")
+
+    scc_arr = filtered_df['SCC'].dropna().to_numpy(dtype=np.int64)
+    if scc_arr.size == 0:
+        return data_reader.combined_df.iloc[:0]
+
+    # Filter for scc numbers from filtered scc dataframe within the pre-split pollutant rows,
+    # testing membership through a boolean lookup table indexed by scc code
+    wanted = scc_mask(scc_uniques, scc_arr)
+    poll_df = poll_index.get(params["pollutant"])
+    if poll_df is None:
+        return data_reader.combined_df.iloc[:0]
+    return poll_df[wanted[poll_df['scc_code'].to_numpy()]]
+
+def analyze_stack_heights(
+    filtered_rows_df: pd.DataFrame,
     save_dir: Path,
     filename: str,
 ):
     """
-    Analyze stack heights by filtering SCC data and creating visualizations.
+    Analyze stack heights of a category's rows and create visualizations.
     
     Parameters
     ----------
-    data_reader : DataReader
-        DataReader instance containing the combined and SCC dataframes
-    keywords : list of str
-        Keywords to filter SCC data
-    scc_level : int
-        SCC level to filter on
-    pollutant : str
-        Pollutant to analyze
+    filtered_rows_df : pandas.DataFrame
+        Rows for the category as returned by `_prepare_category`
     save_dir : Path
         Directory to save plots
     filename : str
         Name of output plot file
-    """
-    # Filter SCC data
-    filtered_df = filter_scc_data(data_reader.df_scc, keywords=keywords, scc_level=scc_level)
-    print(f"\nFiltered SCC dataframe shape: {filtered_df.shape}")
-    print(f"\nFiltered SCC dataframe head: {filtered_df.head()}\n")
 
-    scc_set = set(filtered_df['SCC'].astype(int))
+    Returns
+    -------
+    pandas.DataFrame
+        Stack height statistics with one row per height bin
+    """
+    stkhgt_data = filtered_rows_df['stkhgt']
 
-    # Filter for pollutant and scc numbers from filtered scc dataframe and get rid of nan values for stack height
-    stkhgt_data = filter_poll_data(data_reader.combined_df, pollutant, scc_set)['stkhgt']
+    # Get stats for all data and each stack height bin in a single pass, shared with the plot
+    stats = bin_stats(stkhgt_data.to_numpy(dtype=np.float64))
 
     # Plot stack height analysis
-    plot_stack_height_analysis(stkhgt_data, save_dir=save_dir, filename=filename)
+    plot_stack_height_analysis(stkhgt_data, save_dir=save_dir, filename=filename, stats=stats)
 
-    # Create bins for stack height categories
-    categories = pd.cut(stkhgt_data,
-                       bins=[0, 10, 100, float('inf')],
-                       labels=['0-10', '10-100', '>100'])
-    
-    # Define category mappings
-    category_data = [
-        (stkhgt_data, 'All'),
-        (stkhgt_data[categories == '0-10'], '0-10m'),
-        (stkhgt_data[categories == '10-100'], '10-100m'), 
-        (stkhgt_data[categories == '>100'], '>100m')
-    ]
-
-    # Get stats for all data and each category
-    stats_text = []
-    for data, label in category_data:
-        stats = data.describe()
-        stats_text.append([
-            stats['max'],
-            stats['min'], 
-            stats['mean'],
-            stats['50%'],
-            stats['25%'],
-            stats['75%'],
-            stats['std'],
-            label
-        ])
-    return [stats_text]
+    stats_df = pd.DataFrame(stats, columns=["Max", "Min", "Mean", "Median", "25%", "75%", "Std"])
+    stats_df["height bin"] = ['All', '0-10m', '10-100m', '>100m']
+    return stats_df
 
 def main():
     # Parse command line arguments
     parser = argparse.ArgumentParser(description='Analyze stack heights for different industrial categories')
     parser.add_argument('--config', type=str, required=True, 
                        help='Path to the YAML configuration file')
+    parser.add_argument('--workers', type=int, default=None,
+                       help='Number of parallel workers for reading CSV files and analyzing categories (default: number of CPUs)')
     args = parser.parse_args()
     
     # Load configuration
@@ -116,12 +155,15 @@ def main():
     scc_dir = Path(data_config['scc_dir'])
     scc_filename = data_config['scc_filename']
     
-    # Create save directory if it doesn't exist
-    save_dir.mkdir(exist_ok=True)
+    # Create save directory once, before plots are written to it
+    save_dir.mkdir(parents=True, exist_ok=True)
     
     # Read data
     data_reader = DataReader(data_dir=input_dir, scc_dir=scc_dir, scc_filename=scc_filename)
-    data_reader.read_and_combine_data()
+    data_reader.read_and_combine_data(
+        workers=args.workers or os.cpu_count(),
+        columns=['poll', 'scc', 'stkhgt'],  # only the columns used by the analysis
+    )
     data_reader.read_scc_data()
 
     # Print dataframes
@@ -130,22 +172,34 @@ def main():
     print(f"\nSCC dataframe shape: {data_reader.df_scc.shape}")
     print(f"\nSCC dataframe head: {data_reader.df_scc.head()}\n")
 
-    # Analyze stack heights for each category
-    stats_text = []
+    # Split by pollutant once, shared by all categories
+    poll_index, scc_uniques = _build_pollutant_index(data_reader.combined_df)
+
+    # Select the rows of each category, then analyze the categories in parallel
+    category_rows = {}
     for category, params in analysis_categories.items():
-        stats = analyze_stack_heights(
-            data_reader,
-            keywords=params["keywords"],
-            scc_level=params["scc_level"],
-            pollutant=params["pollutant"],
-            save_dir=save_dir,
-            filename=f"stack_height_analysis_{category}.png"
-        )[0]  # Extract inner list
-        for stat in stats:
-            stat.append(category)  # Add category to each stat row
-        stats_text.extend(stats)
-
-    pd.DataFrame(stats_text, columns=["Max", "Min", "Mean", "Median", "25%", "75%", "Std", "height bin", "category"]).to_csv(save_dir / "stack_height_stats.csv")
+        filtered_rows_df = _prepare_category(data_reader, poll_index, scc_uniques, params)
+        if filtered_rows_df.shape[0] == 0:
+            print(f"\nNo stack heights found for category {category}, skipping")
+            continue
+        category_rows[category] = filtered_rows_df
+    if not category_rows:
+        print("\nNo stack heights found for any category, nothing to analyze")
+        return
+
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = {
+            category: executor.submit(
+                analyze_stack_heights,
+                filtered_rows_df,
+                save_dir=save_dir,
+                filename=f"stack_height_analysis_{category}.png"
+            )
+            for category, filtered_rows_df in category_rows.items()
+        }
+        stats_frames = [future.result().assign(category=category) for category, future in futures.items()]
+
+    pd.concat(stats_frames, ignore_index=True).to_csv(save_dir / "stack_height_stats.csv", index=False)
 
 if __name__ == "__main__":
     main()
@@ -1,9 +1,14 @@
 import pandas as pd
+import numpy as np
+import matplotlib
+# Plots are only ever saved to files, so use the non-interactive backend
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
-import seaborn as sns
+from matplotlib import cbook
 import os
+from process import bin_codes, bin_stats
 
-def plot_stack_height_analysis(stkhgt_data, save_dir="../plots", filename="stack_height_analysis.png"):
+def plot_stack_height_analysis(stkhgt_data, save_dir="../plots", filename="stack_height_analysis.png", stats=None):
     """
     Create detailed plots and statistics for stack height data analysis.
     
@@ -12,31 +17,49 @@ def plot_stack_height_analysis(stkhgt_data, save_dir="../plots", filename="stack
     stkhgt_data : pandas.Series
         Series containing stack height measurements in meters
     save_dir : str, optional
-        Directory to save the plot file (default: "../plots")
+        Directory to save the plot file, created if needed (default: "../plots")
     filename : str, optional
         Name of the output plot file (default: "stack_height_analysis.png")
+    stats : numpy.ndarray, optional
+        Statistics from `process.bin_stats` for `stkhgt_data`, computed here if not given
         
     Returns
     -------
     None
-        Displays plots and prints statistics
+        Saves the plot and prints statistics
     """
     plt.style.use('classic')
+    # Work on a plain float64 array and find the maximum height once
+    arr = np.ascontiguousarray(stkhgt_data.to_numpy(dtype=np.float64))
+    max_height_all = float(np.nanmax(arr))
     # Create bins for stack height categories
-    categories = pd.cut(stkhgt_data, 
-                       bins=[0, 10, 100, float('inf')],
-                       labels=['0-10', '10-100', '>100'])
+    codes = bin_codes(arr)
+    category_labels = ['0-10', '10-100', '>100']
+    # Split into the categories in one pass
+    groups = dict(list(stkhgt_data.groupby(codes)))
+    category_data = {category: groups.get(code, stkhgt_data.iloc[:0])
+                     for code, category in enumerate(category_labels)}
+    # Summary statistics for all data and every category, with empty categories as NaN rows
+    if stats is None:
+        stats = bin_stats(arr)
+    stats_df = pd.DataFrame(stats, index=['All'] + category_labels,
+                            columns=['max', 'min', 'mean', '50%', '25%', '75%', 'std'])
+    counts = np.bincount(codes[codes >= 0], minlength=len(category_labels))
+    stats_df.insert(0, 'count', [np.count_nonzero(~np.isnan(arr)), *counts])
+    stats_df = stats_df[['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max']]  # describe() order
 
     # Create subplots - now 3 rows, 2 columns
-    fig = plt.figure(figsize=(15, 18))
+    # Constrained layout sizes the panels in a single pass, so no tight bbox re-render is needed on save
+    fig = plt.figure(figsize=(15, 18), layout='constrained')
     gs = fig.add_gridspec(3, 2)
 
     # Distribution plot taking full width of top row
     ax_dist = fig.add_subplot(gs[0, :])
     # Modified to use bins with increment of 10
-    max_height = int(stkhgt_data.max() // 10 * 10 + 10)  # Round up to nearest 10
-    bins = range(0, max_height + 10, 10)  # Create bins from 0 to max in steps of 10
-    sns.histplot(data=stkhgt_data, ax=ax_dist, bins=bins)
+    max_height = int(max_height_all // 10 * 10 + 10)  # Round up to nearest 10
+    bins = np.arange(0, max_height + 10, 10, dtype=np.float64)  # Create bins from 0 to max in steps of 10
+    counts, edges = np.histogram(arr, bins=bins)
+    ax_dist.bar(edges[:-1], counts, width=np.diff(edges), align='edge', edgecolor='black')
     ax_dist.set_title('Distribution of All Stack Heights')
     ax_dist.set_xlabel('Stack Height (m)')
     ax_dist.set_ylabel('Count')
@@ -49,8 +72,7 @@ def plot_stack_height_analysis(stkhgt_data, save_dir="../plots", filename="stack
     ax4 = fig.add_subplot(gs[2, 1])
 
     # Helper function to add stats text
-    def add_stats(ax, data, x_pos=.6):
-        stats = data.describe()
+    def add_stats(ax, stats, x_pos=.6):
         stats_text = (
             f"Max: {stats['max']:.1f}m\n"
             f"Min: {stats['min']:.1f}m\n"
@@ -65,59 +87,54 @@ def plot_stack_height_analysis(stkhgt_data, save_dir="../plots", filename="stack
                 verticalalignment='top',
                 bbox=dict(facecolor='white', alpha=0.8, edgecolor='none'))
 
+    # Compute the box plot statistics for all four panels in one call and draw them with bxp
+    box_stats = cbook.boxplot_stats(
+        [arr] + [data.to_numpy(dtype=np.float64) for data in category_data.values()],
+        labels=['All Data', '0-10m', '10-100m', '>100m'],
+    )
+
     # Plot 1: All data
-    bp1 = ax1.boxplot(stkhgt_data, tick_labels=['All Data'])
+    bp1 = ax1.bxp([box_stats[0]])
     ax1.set_title('All Stack Heights')
     ax1.set_ylabel('Stack Height (m)')
     ax1.grid(True, alpha=0.3)
-    max_height_all = stkhgt_data.max()
     yticks_all = range(0, int(max_height_all) + 50, 50)
     ax1.set_yticks(yticks_all)
-    add_stats(ax1, stkhgt_data)
+    add_stats(ax1, stats_df.loc['All'])
 
     # Plot 2: 0-10 range
-    data_0_10 = stkhgt_data[categories == '0-10']
-    bp2 = ax2.boxplot(data_0_10, tick_labels=['0-10m'])
+    bp2 = ax2.bxp([box_stats[1]])
     ax2.set_title('Stack Heights 0-10m')
     ax2.set_ylabel('Stack Height (m)')
     ax2.grid(True, alpha=0.3)
-    add_stats(ax2, data_0_10)
+    add_stats(ax2, stats_df.loc['0-10'])
 
     # Plot 3: 10-100 range
-    data_10_100 = stkhgt_data[categories == '10-100']
-    bp3 = ax3.boxplot(data_10_100, tick_labels=['10-100m'])
+    bp3 = ax3.bxp([box_stats[2]])
     ax3.set_title('Stack Heights 10-100m')
     ax3.set_ylabel('Stack Height (m)')
     ax3.grid(True, alpha=0.3)
-    add_stats(ax3, data_10_100)
+    add_stats(ax3, stats_df.loc['10-100'])
 
     # Plot 4: >100 range with 50-step ticks
-    data_100plus = stkhgt_data[categories == '>100']
-    bp4 = ax4.boxplot(data_100plus, tick_labels=['>100m'])
+    bp4 = ax4.bxp([box_stats[3]])
     ax4.set_title('Stack Heights >100m')
     ax4.set_ylabel('Stack Height (m)')
     ax4.grid(True, alpha=0.3)
-    max_height_100plus = data_100plus.max()
+    max_height_100plus = stats_df.loc['>100', 'max']
     yticks = range(100, int(max_height_100plus) + 50, 50)
     ax4.set_yticks(yticks)
-    add_stats(ax4, data_100plus)
+    add_stats(ax4, stats_df.loc['>100'])
 
     plt.suptitle('', fontsize=16, y=0.95)
-    plt.tight_layout()
-    
-    # Create save directory if it doesn't exist
-    os.makedirs(save_dir, exist_ok=True)
     
     # Save the plot
+    os.makedirs(save_dir, exist_ok=True)
     save_path = os.path.join(save_dir, filename)
-    plt.savefig(save_path, dpi=300, bbox_inches='tight')
-    # plt.show()
+    # Fast PNG compression: larger files, but much less time spent encoding
+    plt.savefig(save_path, dpi=300, pil_kwargs={'compress_level': 1})
     plt.close()
 
     # Print summary statistics for each category
     print("\nSummary statistics by category:")
-    print("\nAll data:")
-    print(stkhgt_data.describe())
-    for category in ['0-10', '10-100', '>100']:
-        print(f"\nCategory {category}:")
-        print(stkhgt_data[categories == category].describe())
+    print(stats_df.to_string())
@@ -1,4 +1,6 @@
+import re
 import pandas as pd
+import numpy as np
 
 def filter_scc_data(df: pd.DataFrame, keywords: str | list[str] | None = None, scc_level: int | None = None) -> pd.DataFrame:
     """
@@ -36,11 +38,19 @@ def filter_scc_data(df: pd.DataFrame, keywords: str | list[str] | None = None, s
         if isinstance(keywords, str):
             keywords = [keywords]
             
-        # Filter for any of the keywords
-        mask = filtered_df[scc_level_str].str.contains(keywords[0], case=False, na=False)
-        for keyword in keywords[1:]:
-            mask |= filtered_df[scc_level_str].str.contains(keyword, case=False, na=False)
+        # Filter for any of the keywords with a single alternation pattern
+        pattern = '|'.join(re.escape(keyword) for keyword in keywords)
+        column = filtered_df[scc_level_str]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            # Search only the unique descriptions, then map back through the codes (-1 is NaN)
+            category_mask = column.cat.categories.str.contains(pattern, case=False, regex=True)
+            mask = np.append(category_mask, False)[column.cat.codes.to_numpy()]
+        else:
+            mask = column.str.contains(pattern, case=False, regex=True, na=False)
         filtered_df = filtered_df[mask]
+        if filtered_df.shape[0] == 0:
+            print(f"\nNo values in {scc_level_str} match keywords {keywords}")
+            return filtered_df
         
         # Print unique values after filtering, one per line
         print(f"\nUnique values in {scc_level_str} after filtering:")
@@ -49,18 +59,49 @@ def filter_scc_data(df: pd.DataFrame, keywords: str | list[str] | None = None, s
     
     return filtered_df
 
-def filter_poll_data(df: pd.DataFrame, poll: str | list[str], scc_set: set) -> pd.DataFrame:
+def scc_mask(values: np.ndarray, scc_codes: np.ndarray) -> np.ndarray:
     """
-    Filter dataframe for specific pollutant(s) and valid stack heights, limiting to provided SCCs
+    Test which SCC values are among the given SCC codes
+    
+    The SCC codes are sorted once and every value is located with a single
+    `np.searchsorted`, keeping only exact matches.
     
+    Parameters
+    ----------
+    values : numpy.ndarray
+        int64 SCC values to test
+    scc_codes : numpy.ndarray
+        int64 SCC codes to test against, in any order
+        
+    Returns
+    -------
+    numpy.ndarray
+        Boolean array, True where the value is one of `scc_codes`
+    """
+    values = np.asarray(values, dtype=np.int64)
+    scc_arr = np.unique(np.asarray(scc_codes, dtype=np.int64))
+    if scc_arr.size == 0:
+        return np.zeros(values.shape, dtype=bool)
+    # Binary search into the sorted SCCs and keep values that land on an exact match
+    idx = np.minimum(np.searchsorted(scc_arr, values), scc_arr.size - 1)
+    return scc_arr[idx] == values
+
+def filter_poll_data(df: pd.DataFrame, poll: str | list[str], scc_set: set | np.ndarray) -> pd.DataFrame:
+    """
+    Filter dataframe for specific pollutant(s) and valid stack heights, limiting to provided SCCs
+
+    Not used by `main.py`, which selects category rows through its pollutant
+    index; kept as a standalone helper for interactive use such as
+    `explore.ipynb`. SCC membership goes through `scc_mask` in both places.
+
     Parameters
     ----------
     df : pandas.DataFrame
         Input dataframe to filter
     poll : str or list of str
         Pollutant(s) to filter for
-    scc_set : set
-        Set of SCC codes to filter for
+    scc_set : set or numpy.ndarray
+        SCC codes to filter for, e.g. an int64 array of filtered SCCs
         
     Returns
     -------
@@ -71,10 +112,84 @@ def filter_poll_data(df: pd.DataFrame, poll: str | list[str], scc_set: set) -> p
     if isinstance(poll, str):
         poll = [poll]
         
-    filtered_df = df[
-        (df.poll.isin(poll)) &
-        (df.stkhgt.notna()) &
-        (df["scc"].isin(scc_set))
-    ]
+    # Test SCC membership on plain int64 arrays; SCCs are positive so -1 marks a missing one
+    scc_values = df["scc"].to_numpy(dtype=np.int64, na_value=-1)
+
+    # Accumulate the conditions in place into a single boolean array
+    mask = df.poll.isin(poll).to_numpy(dtype=bool, copy=True)
+    mask &= df.stkhgt.notna().to_numpy(dtype=bool)
+    if not isinstance(scc_set, np.ndarray):
+        scc_set = np.fromiter(scc_set, dtype=np.int64, count=len(scc_set))
+    mask &= scc_mask(scc_values, scc_set)
+    filtered_df = df.iloc[np.flatnonzero(mask)]
+    
+    return filtered_df
+
+def bin_codes(x: np.ndarray) -> np.ndarray:
+    """
+    Assign stack heights to the 0-10, 10-100 and >100 height bins
+    
+    Bins are right-closed like `pd.cut(x, bins=[0, 10, 100, inf])`, but the
+    assignment is a single `np.searchsorted` over the bin edges instead of
+    building a Categorical.
+    
+    Parameters
+    ----------
+    x : numpy.ndarray
+        Stack heights in meters
+        
+    Returns
+    -------
+    numpy.ndarray
+        int8 bin codes: 0 for 0-10, 1 for 10-100, 2 for >100 and -1 for
+        values outside every bin (<= 0 or NaN)
+    """
+    x = np.asarray(x, dtype=np.float64)
+    codes = (np.searchsorted([0.0, 10.0, 100.0], x, side='left') - 1).astype(np.int8)
+    codes[np.isnan(x)] = -1
+    return codes
+
+
+def bin_stats(x: np.ndarray) -> np.ndarray:
+    """
+    Compute summary statistics for all stack heights and each height bin
+    
+    Only the seven reported statistics are computed. Quartiles come from a
+    single `np.partition` over the interpolation positions, which is O(n)
+    instead of the full sort `describe()` performs.
+    
+    Parameters
+    ----------
+    x : numpy.ndarray
+        Stack heights in meters; NaN values are ignored
+        
+    Returns
+    -------
+    numpy.ndarray
+        4x7 array with rows All, 0-10, 10-100, >100 and columns max, min,
+        mean, median, 25%, 75%, std. Empty bins are filled with NaN
+    """
+    x = np.asarray(x, dtype=np.float64)
+    x = x[~np.isnan(x)]
+    codes = bin_codes(x)
+    slices = [x, x[codes == 0], x[codes == 1], x[codes == 2]]
     
-    return filtered_df
\ No newline at end of file
+    stats = np.full((4, 7), np.nan)
+    for i, values in enumerate(slices):
+        n = values.size
+        if n == 0:
+            continue
+        # Linear interpolation between closest ranks, as in Series.quantile
+        pos = np.array([0.5, 0.25, 0.75]) * (n - 1)
+        lo = np.floor(pos).astype(np.int64)
+        hi = np.minimum(lo + 1, n - 1)
+        part = np.partition(values, np.unique(np.concatenate([lo, hi])))
+        quartiles = part[lo] + (part[hi] - part[lo]) * (pos - lo)
+        stats[i] = [
+            values.max(),
+            values.min(),
+            values.mean(),
+            *quartiles,
+            values.std(ddof=1) if n > 1 else np.nan,
+        ]
+    return stats
@@ -2,6 +2,11 @@ import pandas as pd
 import numpy as np
 from pathlib import Path
 import os
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+import pyarrow as pa
+import pyarrow.csv as pv
 
 class DataReader:
     def __init__(self, data_dir: Path, scc_dir: Path, scc_filename: str):
@@ -14,26 +19,26 @@ class DataReader:
 
     def _get_csv_files(self, directory):
         """Recursively get all CSV files in directory and subdirectories"""
-        csv_files = []
-        for root, dirs, files in os.walk(directory):
-            for file in files:
-                if file.endswith('.csv'):
-                    csv_files.append(os.path.join(root, file))
-        return csv_files
+        return sorted(str(path) for path in Path(directory).rglob('*.csv'))
 
-    def _read_csv_with_comments(self, filepath):
-        """Read CSV file, handling comment lines at the start"""
-        # Count comment lines to skip
-        with open(filepath, 'r') as f:
-            skip_lines = 0
-            for line in f:
-                if line.startswith('#'):
-                    skip_lines += 1
-                else:
-                    break
-                    
-        # Read CSV skipping comment lines
-        return pd.read_csv(filepath, skiprows=skip_lines)
+    @staticmethod
+    def _read_csv_with_comments(filepath, columns=None):
+        """Read CSV file into an Arrow table, handling comment lines at the start and keeping only `columns` if given"""
+        read_options = pv.ReadOptions(use_threads=True, block_size=8 << 20)
+        convert_options = pv.ConvertOptions(
+            column_types={'scc': pa.int64(), 'stkhgt': pa.float64()},
+            include_columns=columns,
+            include_missing_columns=True,  # requested columns missing from a file are read as nulls
+            strings_can_be_null=True,
+        )
+        with open(filepath, 'rb') as f:
+            # Step over the leading comment lines, then parse from the header line
+            # with Arrow's multi-threaded block reader without reopening the file
+            header_pos = 0
+            while f.readline().startswith(b'#'):
+                header_pos = f.tell()
+            f.seek(header_pos)
+            return pv.read_csv(f, read_options=read_options, convert_options=convert_options)
 
     def print_directory_structure(self):
         """Print directory tree structure"""
@@ -47,31 +52,104 @@ class DataReader:
                 if f.endswith('.csv'):
                     print(f"{subindent}{f}")
 
-    def read_and_combine_data(self):
-        """Read and concatenate all CSV files"""
-        dataframes = []
-        for i, csv_file in enumerate(self.csv_files):
-            try:
-                print(f"{i}/{len(self.csv_files)}: Reading {csv_file}")
-                df = self._read_csv_with_comments(csv_file)
-                dataframes.append(df)
-                print(f"Successfully read: {csv_file}")
-            except Exception as e:
-                print(f"Error reading {csv_file}: {str(e)}")
+    def _cache_path(self, cache_dir, name, source_files):
+        """Parquet cache path `<name>-<key>.parquet`, keyed by the source file paths and modification times"""
+        if not source_files:
+            return None
+        sources = sorted((str(f), os.path.getmtime(f)) for f in source_files)
+        key = hashlib.sha1(repr(sources).encode()).hexdigest()
+        return Path(cache_dir) / '.cache' / f'{name}-{key}.parquet'
+
+    def _read_cache(self, cache_path):
+        """Read a Parquet cache if it exists"""
+        if cache_path is None or not os.path.exists(cache_path):
+            return None
+        print(f"Reading cached data from {cache_path}")
+        return pd.read_parquet(cache_path, engine='pyarrow')
+
+    def _write_cache(self, df, cache_path):
+        """Write a dataframe to a zstd-compressed Parquet cache"""
+        if cache_path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            df.to_parquet(cache_path, engine='pyarrow', compression='zstd')
+            print(f"Cached data to {cache_path}")
+        except Exception as e:
+            print(f"Error caching data to {cache_path}: {str(e)}")
+            return
+        # Remove superseded caches of the same name so .cache does not grow with every source change
+        name = cache_path.stem.rsplit('-', 1)[0]
+        for stale_path in cache_path.parent.glob(f'{name}-*.parquet'):
+            if stale_path != cache_path and stale_path.stem.rsplit('-', 1)[0] == name:
+                try:
+                    stale_path.unlink()
+                except OSError as e:
+                    print(f"Error removing stale cache {stale_path}: {str(e)}")
+
+    def _read_csv_file(self, i, csv_file, columns=None):
+        """Read one CSV file, printing progress and returning None on failure"""
+        try:
+            print(f"{i}/{len(self.csv_files)}: Reading {csv_file}")
+            table = self._read_csv_with_comments(csv_file, columns=columns)
+            print(f"Successfully read: {csv_file}")
+            return table
+        except Exception as e:
+            print(f"Error reading {csv_file}: {str(e)}")
+            return None
 
-        if dataframes:
-            self.combined_df = pd.concat(dataframes, ignore_index=True)
+    def read_and_combine_data(self, workers=None, columns=None, use_cache=True):
+        """Read CSV files in parallel threads and concatenate them, reusing a Parquet cache in data_dir/.cache"""
+        # If given, `columns` limits parsing to those columns and must include scc and stkhgt
+        # Projected reads get their own cache name, so a full read never returns a projected cache
+        cache_name = 'combined' if columns is None else '-'.join(['combined', *sorted(set(columns))])
+        cache_path = self._cache_path(self.data_dir, cache_name, self.csv_files) if use_cache else None
+        cached_df = self._read_cache(cache_path)
+        if cached_df is not None:
+            self.combined_df = cached_df
+            return
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(
+                self._read_csv_file, range(len(self.csv_files)), self.csv_files, repeat(columns)
+            )
+            tables = [table for table in results if table is not None]
+
+        if tables:
+            try:
+                # Concatenate in Arrow and convert to pandas once; scc and stkhgt are typed at parse time
+                table = pa.concat_tables(tables, promote_options='permissive')
+                self.combined_df = table.to_pandas(types_mapper=pd.ArrowDtype)
+            except pa.ArrowTypeError:
+                # Some column was inferred with incompatible types across files, let pandas upcast it
+                self.combined_df = pd.concat(
+                    [table.to_pandas(types_mapper=pd.ArrowDtype) for table in tables], ignore_index=True
+                )
             # Remove rows that are all NaN
             self.combined_df = self.combined_df.dropna(how='all')
-            # Convert scc to integer and stkhgt to float
-            self.combined_df['scc'] = self.combined_df['scc'].astype('Int64')  # Int64 allows for NaN values
-            self.combined_df['stkhgt'] = self.combined_df['stkhgt'].astype('float64')
             self.combined_df['stkhgt'] = self.combined_df['stkhgt'] * 0.3048 # convert feet to meters
-            print(f"\nCombined {len(dataframes)} CSV files into dataframe with shape: {self.combined_df.shape}")
+            print(f"\nCombined {len(tables)} CSV files into dataframe with shape: {self.combined_df.shape}")
+            # Only cache a complete read, otherwise the failed files would be left out until their mtimes change
+            if len(tables) == len(self.csv_files):
+                self._write_cache(self.combined_df, cache_path)
+            else:
+                print(f"Not caching data: {len(self.csv_files) - len(tables)} of {len(self.csv_files)} CSV files failed to read")
         else:
             print("\nNo CSV files were successfully read")
 
-    def read_scc_data(self):
-        """Read SCC data file"""
+    def read_scc_data(self, use_cache=True):
+        """Read SCC data file, reusing a Parquet cache in scc_dir/.cache"""
         filepath = self.scc_dir / self.scc_filename
-        self.df_scc = pd.read_csv(filepath)
\ No newline at end of file
+        cache_path = self._cache_path(self.scc_dir, 'scc', [filepath]) if use_cache else None
+        cached_df = self._read_cache(cache_path)
+        if cached_df is not None:
+            self.df_scc = cached_df
+            return
+
+        self.df_scc = pd.read_csv(filepath)
+        # Convert SCC to integer once so filtered SCCs can be used as an int64 array
+        self.df_scc['SCC'] = pd.to_numeric(self.df_scc['SCC'], errors='coerce').astype('Int64')
+        # Store the repeated SCC level descriptions as categoricals so keyword searches scan unique values only
+        for col in [col for col in self.df_scc.columns if col.startswith('scc level')]:
+            self.df_scc[col] = self.df_scc[col].astype('category')
+        self._write_cache(self.df_scc, cache_path)